@@ -8,10 +8,25 @@
 # 1.1 IMPORTS AND INITIALIZATION
 # ---------------------------------
 import pygame  # Imports the main Pygame library for game development.
-import random  # Imports the random library for generating random numbers (e.g., for alien positions).
-import math  # Imports the math library, though it's not used in the final version, it's good practice for game math.
 import json  # Imports the JSON library to work with JSON files for saving and loading user data.
 import os  # Imports the os library to interact with the operating system, used here to check for file existence.
+import sys  # Imports the sys library to check which Python interpreter is running the game.
+from functools import partial  # Imports partial to bind a value to a key handler ahead of time.
+from itertools import repeat  # Imports repeat to pair one sprite image with many positions without a Python loop.
+
+# PyPy's JIT compiles plain Python loops over lists of ints itself, while calls into NumPy are slow there, so under
+# PyPy the aliens and bullets are kept in lists and NumPy is never imported. (PyPy needs pygame-ce, which ships
+# PyPy wheels, instead of the legacy pygame package.)
+IS_PYPY = '__pypy__' in sys.builtin_module_names  # Checks if the game is running under PyPy.
+if IS_PYPY:
+    import random  # Imports the random library to pick alien positions one at a time.
+else:
+    import numpy as np  # Imports NumPy to update and test all aliens at once with array math instead of a Python loop.
+
+    try:
+        from numba import njit  # Imports Numba's JIT compiler, which turns the alien update loop into machine code.
+    except ImportError:  # Numba is optional; without it the aliens are updated with NumPy array math instead.
+        njit = None
 
 pygame.init()  # Initializes all the imported Pygame modules required for the game to run.
 
@@ -19,6 +34,7 @@ pygame.init()  # Initializes all the imported Pygame modules required for the ga
 # 1.2 SCREEN AND DISPLAY SETUP
 # ---------------------------------
 WIDTH, HEIGHT = 1920, 1080  # Sets the width and height of the game window in pixels.
+FPS = 60  # The frame rate the main game loop is capped at; all movement speeds are in pixels per 1/FPS second.
 screen = pygame.display.set_mode((WIDTH, HEIGHT))  # Creates the main game window with the specified dimensions.
 pygame.display.set_caption("EXODUS")  # Sets the title of the game window.
 
@@ -34,18 +50,25 @@ except pygame.error as e:  # Catches an error if the image file cannot be loaded
 # ---------------------------------
 # Attempt to load all game images, with error handling to ensure the game can't run without them.
 try:
+    # Each image is converted to the display's pixel format once here, so blits don't have to convert it every frame.
     background = pygame.transform.scale(pygame.image.load('bg3.png'),
-                                        (WIDTH, HEIGHT))  # Loads and scales the background image to fit the screen.
+                                        (WIDTH, HEIGHT)).convert()  # Loads and scales the background image to fit the screen (opaque, so no alpha).
     player_img = pygame.transform.scale(pygame.image.load('jet.png'),
-                                        (60, 60))  # Loads and scales the player's ship image.
-    bullet_img = pygame.transform.scale(pygame.image.load('bullet.png'), (20, 40))  # Loads and scales the bullet image.
-    alien_img = pygame.transform.scale(pygame.image.load('alien.png'), (60, 60))  # Loads and scales the alien image.
+                                        (60, 60)).convert_alpha()  # Loads and scales the player's ship image.
+    bullet_img = pygame.transform.scale(pygame.image.load('bullet.png'),
+                                        (20, 40)).convert_alpha()  # Loads and scales the bullet image.
+    alien_img = pygame.transform.scale(pygame.image.load('alien.png'),
+                                       (60, 60)).convert_alpha()  # Loads and scales the alien image.
 except pygame.error as e:  # Catches an error if any image file fails to load.
     print(
         f"Fatal Error: Could not load game assets. Please ensure image files are in the correct directory. Error: {e}")  # Prints a fatal error message.
     pygame.quit()  # Quits all Pygame modules.
     exit()  # Exits the Python script.
 
+PLAYER_W = player_img.get_width()  # Stores the player's width once, since the image never changes.
+BULLET_W, BULLET_H = bullet_img.get_size()  # Stores the bullet's size once instead of asking the image every shot.
+BULLET_X_OFFSET = PLAYER_W // 2 - BULLET_W // 2  # The X offset that centers a new bullet on the player's ship.
+
 # ---------------------------------
 # 1.4 FONT SETUP
 # ---------------------------------
@@ -53,6 +76,8 @@ title_font = pygame.font.Font(None,
                               100)  # Creates a font object for large title text. 'None' uses the default Pygame font.
 text_font = pygame.font.Font(None, 50)  # Creates a font object for standard text.
 small_font = pygame.font.Font(None, 35)  # Creates a font object for smaller informational text.
+input_font = pygame.font.Font(None, 40)  # Creates a font object for the text typed into input boxes.
+game_over_font = pygame.font.Font(None, 80)  # Creates a large font object for the "GAME OVER" text.
 
 # ===================================================================================
 # SECTION 2: DATA HANDLING AND REUSABLE COMPONENTS
@@ -102,7 +127,7 @@ class InputBox:
         self.color = (255, 255, 255)  # Sets the default color of the input box border (white).
         self.text = ''  # Initializes the user-entered text as an empty string.
         self.placeholder = placeholder  # Stores the placeholder text to show when the box is empty.
-        self.font = pygame.font.Font(None, 40)  # Sets the font for the text inside the box.
+        self.font = input_font  # Uses the shared input font for the text inside the box.
         self.txt_surface = self.font.render(self.placeholder, True, self.color)  # Renders the initial placeholder text.
         self.active = False  # A flag to track if the user is currently typing in this box.
         self.is_password = is_password  # A flag to determine if the text should be hidden (for passwords).
@@ -135,15 +160,33 @@ class InputBox:
 
 
 # ---------------------------------
-# 2.3 BUTTON DRAW FUNCTION
+# 2.3 TEXT RENDER CACHE
+# ---------------------------------
+_text_cache = {}  # Maps (font, text, color) to a surface that has already been rendered.
+
+
+def cached_render(font, text, color):
+    """Renders text like font.render, but reuses the surface if the same text was rendered before."""
+    key = (id(font), text, color)  # Identifies the text by its font, content and color.
+    surface = _text_cache.get(key)  # Looks for a previously rendered surface.
+    if surface is None:  # Only rasterizes the text the first time it is needed.
+        if len(_text_cache) > 256:  # Keeps the cache from growing forever as the score keeps changing.
+            _text_cache.clear()
+        surface = font.render(text, True, color).convert_alpha()  # Renders the text in the display's pixel format.
+        _text_cache[key] = surface  # Stores it for the following frames.
+    return surface
+
+
+# ---------------------------------
+# 2.4 BUTTON DRAW FUNCTION
 # ---------------------------------
-def draw_button(text, x, y, w, h):
-    """Draws a clickable button and returns its rectangle."""
+def draw_button(text, x, y, w, h, surface=screen):
+    """Draws a clickable button (on the screen unless another surface is given) and returns its rectangle."""
     rect = pygame.Rect(x, y, w, h)  # Creates a rectangle for the button's position and size.
-    pygame.draw.rect(screen, (0, 100, 200), rect,
+    pygame.draw.rect(surface, (0, 100, 200), rect,
                      border_radius=8)  # Draws the button's background with rounded corners.
-    txt_surface = text_font.render(text, True, (255, 255, 255))  # Renders the text for the button.
-    screen.blit(txt_surface, (x + w // 2 - txt_surface.get_width() // 2,
+    txt_surface = cached_render(text_font, text, (255, 255, 255))  # Gets the rendered text for the button.
+    surface.blit(txt_surface, (x + w // 2 - txt_surface.get_width() // 2,
                               y + h // 2 - txt_surface.get_height() // 2))  # Draws the text centered on the button.
     return rect  # Returns the button's rectangle, used to check for clicks.
 
@@ -157,6 +200,10 @@ def draw_button(text, x, y, w, h):
 # ---------------------------------
 # 3.1 LOGIN SCREEN
 # ---------------------------------
+login_panel = pygame.Surface((400, 320), pygame.SRCALPHA).convert_alpha()  # Creates the semi-transparent panel once, not every frame.
+login_panel.fill((0, 0, 0, 180))  # Fills the panel with black color at 180/255 transparency.
+
+
 def login_screen():
     """Displays the login/register screen and handles user authentication."""
     username_box = InputBox(WIDTH // 2 - 150, HEIGHT // 2 - 70, 300, 50,
@@ -165,37 +212,39 @@ def login_screen():
                             is_password=True)  # Creates a password input box.
     error = ''  # Initializes an empty string to hold any error messages.
     clock = pygame.time.Clock()  # Creates a clock object to control the screen's frame rate.
+    title = title_font.render("EXODUS LOGIN", True, (0, 255, 0)).convert_alpha()  # Renders the login screen title once.
+    last_username = None  # The username the score texts were last rendered for.
+    score_texts = []  # The rendered score texts and their Y positions for that username.
+    users = load_users()  # Loads the user data once; registering updates this dictionary and saves it.
 
     while True:  # The main loop for the login screen.
         screen.blit(background, (0, 0))  # Draws the background image.
 
-        panel_surface = pygame.Surface((400, 320),
-                                       pygame.SRCALPHA)  # Creates a new surface for a semi-transparent panel.
-        panel_surface.fill((0, 0, 0, 180))  # Fills the panel with black color at 180/255 transparency.
-        screen.blit(panel_surface, (WIDTH // 2 - 200, HEIGHT // 2 - 140))  # Draws the panel onto the screen.
+        screen.blit(login_panel, (WIDTH // 2 - 200, HEIGHT // 2 - 140))  # Draws the panel onto the screen.
 
-        title = title_font.render("EXODUS LOGIN", True, (0, 255, 0))  # Renders the login screen title.
         screen.blit(title, (WIDTH // 2 - title.get_width() // 2,
                             HEIGHT // 2 - 200))  # Draws the title centered at the top of the panel.
 
         username_box.draw(screen)  # Draws the username input box.
         password_box.draw(screen)  # Draws the password input box.
 
-        users = load_users()  # Loads the current user data from the file.
         username_text = username_box.text.strip()  # Gets the text from the username box, removing leading/trailing whitespace.
-        if username_text in users:  # Checks if the entered username exists in the user data.
-            last_score = users[username_text].get('last_score',
-                                                  0)  # Gets the last score for that user, defaulting to 0.
-            high_score_val = users[username_text].get('high_score',
-                                                      0)  # Gets the high score for that user, defaulting to 0.
-            last_score_text = small_font.render(f"Last Score: {last_score}", True,
-                                                (255, 255, 255))  # Renders the last score text.
-            high_score_text = small_font.render(f"High Score: {high_score_val}", True,
-                                                (255, 255, 0))  # Renders the high score text.
-            screen.blit(last_score_text,
-                        (WIDTH // 2 - last_score_text.get_width() // 2, HEIGHT // 2 + 60))  # Draws the last score text.
-            screen.blit(high_score_text,
-                        (WIDTH // 2 - high_score_text.get_width() // 2, HEIGHT // 2 + 95))  # Draws the high score text.
+        if username_text != last_username:  # Only re-renders the score texts when the typed username changes.
+            last_username = username_text  # Remembers which username the texts are for.
+            score_texts = []  # Shows no scores unless the username exists.
+            if username_text in users:  # Checks if the entered username exists in the user data.
+                last_score = users[username_text].get('last_score',
+                                                      0)  # Gets the last score for that user, defaulting to 0.
+                high_score_val = users[username_text].get('high_score',
+                                                          0)  # Gets the high score for that user, defaulting to 0.
+                score_texts = [
+                    (small_font.render(f"Last Score: {last_score}", True, (255, 255, 255)),
+                     HEIGHT // 2 + 60),  # Renders the last score text.
+                    (small_font.render(f"High Score: {high_score_val}", True, (255, 255, 0)),
+                     HEIGHT // 2 + 95),  # Renders the high score text.
+                ]
+        for score_text, y in score_texts:  # Draws each score text centered below the input boxes.
+            screen.blit(score_text, (WIDTH // 2 - score_text.get_width() // 2, y))
 
         login_btn = draw_button("Login", WIDTH // 2 - 160, HEIGHT // 2 + 140, 150, 50)  # Draws the login button.
         register_btn = draw_button("Register", WIDTH // 2 + 10, HEIGHT // 2 + 140, 150,
@@ -249,48 +298,61 @@ def login_screen():
 # ---------------------------------
 # 3.2 IN-GAME UI FUNCTIONS
 # ---------------------------------
-def show_info():
-    """Displays the score, high score, and lives at the top of the screen."""
-    pygame.draw.rect(screen, (10, 10, 10, 200), (0, 0, WIDTH, 40))  # Draws a semi-transparent black bar at the top.
-    pygame.draw.line(screen, (255, 255, 255), (0, 40), (WIDTH, 40), 2)  # Draws a white line below the bar.
-    screen.blit(font.render(f"Score: {score}", True, (255, 255, 255)), (30, 10))  # Renders and draws the current score.
-    screen.blit(font.render(f"High Score: {high_score}", True, (255, 215, 0)),
-                (WIDTH // 2 - 100, 10))  # Renders and draws the high score in gold.
-    screen.blit(font.render(f"Lives: {lives}", True, (0, 255, 0)),
-                (WIDTH - 180, 10))  # Renders and draws the remaining lives in green.
+HUD_HEIGHT = 42  # The height of the info bar, including the line below it.
+hud_bg = pygame.Surface((WIDTH, HUD_HEIGHT)).convert()  # Builds the info bar background once so each frame is a single blit.
+hud_bg.fill((10, 10, 10))  # Fills the bar with near-black.
+pygame.draw.line(hud_bg, (255, 255, 255), (0, 40), (WIDTH, 40), 2)  # Bakes the white line below the bar into it.
+
+
+def info_blits():
+    """Returns the (surface, position) pairs that draw the score, high score, and lives at the top of the screen."""
+    return [
+        (hud_bg, (0, 0)),  # The pre-built info bar background.
+        (cached_render(font, f"Score: {score}", (255, 255, 255)), (30, 10)),  # The current score.
+        (cached_render(font, f"High Score: {high_score}", (255, 215, 0)), (WIDTH // 2 - 100, 10)),  # The high score in gold.
+        (cached_render(font, f"Lives: {lives}", (0, 255, 0)), (WIDTH - 180, 10)),  # The remaining lives in green.
+    ]
 
 
 # ---------------------------------
 # 3.3 START SCREEN
 # ---------------------------------
+easy_btn = pygame.Rect(WIDTH // 2 - 100, HEIGHT // 2 - 60, 200, 50)  # The 'Easy' difficulty button's rectangle.
+medium_btn = pygame.Rect(WIDTH // 2 - 100, HEIGHT // 2 + 10, 200, 50)  # The 'Medium' difficulty button's rectangle.
+hard_btn = pygame.Rect(WIDTH // 2 - 100, HEIGHT // 2 + 80, 200, 50)  # The 'Hard' difficulty button's rectangle.
+start_title = title_font.render("EXODUS", True, (0, 255, 0))  # Renders the main game title once.
+start_title_rect = start_title.get_rect(midtop=(WIDTH // 2, HEIGHT // 2 - 200))  # Centers the title in the upper-middle.
+START_SCREEN_RECT = start_title_rect.unionall([easy_btn, medium_btn, hard_btn])  # The area the start screen covers.
+START_SCREEN_SURF = pygame.Surface(START_SCREEN_RECT.size,
+                                   pygame.SRCALPHA).convert_alpha()  # Holds the title and buttons, built once.
+START_SCREEN_SURF.blit(start_title, start_title_rect.move(-START_SCREEN_RECT.x, -START_SCREEN_RECT.y))  # Adds the title.
+for text, rect in (("1 - Easy", easy_btn), ("2 - Medium", medium_btn), ("3 - Hard", hard_btn)):  # Adds each button.
+    draw_button(text, *rect.move(-START_SCREEN_RECT.x, -START_SCREEN_RECT.y), surface=START_SCREEN_SURF)
+
+
 def show_start_screen():
     """Draws the start screen where the player selects the difficulty."""
-    title = title_font.render("EXODUS", True, (0, 255, 0))  # Renders the main game title.
-    screen.blit(title, (WIDTH // 2 - title.get_width() // 2,
-                        HEIGHT // 2 - 200))  # Draws the title in the upper-middle of the screen.
-    easy_btn = draw_button("1 - Easy", WIDTH // 2 - 100, HEIGHT // 2 - 60, 200,
-                           50)  # Draws the 'Easy' difficulty button.
-    medium_btn = draw_button("2 - Medium", WIDTH // 2 - 100, HEIGHT // 2 + 10, 200,
-                             50)  # Draws the 'Medium' difficulty button.
-    hard_btn = draw_button("3 - Hard", WIDTH // 2 - 100, HEIGHT // 2 + 80, 200,
-                           50)  # Draws the 'Hard' difficulty button.
+    screen.blit(START_SCREEN_SURF, START_SCREEN_RECT)  # Draws the pre-built title and buttons in one blit.
     return easy_btn, medium_btn, hard_btn  # Returns the rectangles of the buttons for click detection.
 
 
 # ---------------------------------
 # 3.4 GAME OVER SCREEN
 # ---------------------------------
+over_text = game_over_font.render("GAME OVER", True,
+                                  (255, 0, 0))  # Renders the "GAME OVER" text in red once, as it never changes.
+restart_text = text_font.render("Press 'R' to Restart", True, (255, 255, 255))  # Renders the restart text in white once.
+over_text_rect = over_text.get_rect(midtop=(WIDTH // 2, HEIGHT // 2 - 50))  # Centers the "GAME OVER" text.
+restart_text_rect = restart_text.get_rect(midtop=(WIDTH // 2, HEIGHT // 2 + 50))  # Centers the restart text below it.
+GAME_OVER_RECT = over_text_rect.union(restart_text_rect)  # The area the game over screen covers.
+GAME_OVER_SURF = pygame.Surface(GAME_OVER_RECT.size, pygame.SRCALPHA).convert_alpha()  # Holds both texts, built once.
+GAME_OVER_SURF.blit(over_text, over_text_rect.move(-GAME_OVER_RECT.x, -GAME_OVER_RECT.y))  # Adds the "GAME OVER" text.
+GAME_OVER_SURF.blit(restart_text, restart_text_rect.move(-GAME_OVER_RECT.x, -GAME_OVER_RECT.y))  # Adds the restart text.
+
+
 def show_game_over():
     """Displays the game over message and restart instructions."""
-    over_font = pygame.font.Font(None, 80)  # Creates a large font for the "GAME OVER" text.
-    restart_font = pygame.font.Font(None, 50)  # Creates a smaller font for the restart instruction.
-    over_text = over_font.render("GAME OVER", True, (255, 0, 0))  # Renders the "GAME OVER" text in red.
-    restart_text = restart_font.render("Press 'R' to Restart", True,
-                                       (255, 255, 255))  # Renders the restart text in white.
-    screen.blit(over_text,
-                (WIDTH // 2 - over_text.get_width() // 2, HEIGHT // 2 - 50))  # Draws the "GAME OVER" text centered.
-    screen.blit(restart_text,
-                (WIDTH // 2 - restart_text.get_width() // 2, HEIGHT // 2 + 50))  # Draws the restart text below it.
+    screen.blit(GAME_OVER_SURF, GAME_OVER_RECT)  # Draws the pre-built texts in one blit.
 
 
 # ===================================================================================
@@ -311,6 +373,8 @@ difficulty_settings = {  # A dictionary containing settings for each difficulty
     "Hard": {"num_aliens": 60, "alien_speed": 8, "alien_drop": 70}  # Settings for Hard mode.
 }
 current_difficulty = {}  # An empty dictionary to hold the settings for the currently selected difficulty.
+alien_speed = 0  # The chosen difficulty's alien speed, copied out of the dictionary once when a game starts.
+alien_drop = 0  # The chosen difficulty's alien drop, copied out the same way.
 
 # ---------------------------------
 # 4.2 PLAYER VARIABLES
@@ -320,22 +384,41 @@ playerY = HEIGHT - 150  # Sets the player's initial Y position near the bottom o
 playerX_change = 0  # Initializes the player's horizontal speed to 0.
 playerY_change = 0  # Initializes the player's vertical speed to 0.
 player_speed = 7  # Sets the speed at which the player moves.
+player_rect = pygame.Rect(playerX, playerY, 60, 60)  # The player's rectangle, created once and moved every frame.
+screen_rect = screen.get_rect()  # The screen's rectangle, used to keep the player on-screen.
 player_damaged = False  # A flag to track if the player has recently taken damage.
 damage_timer = 0  # A timer to control the duration of the player's invulnerability after being hit.
+damage_overlay = pygame.Surface((60, 60), pygame.SRCALPHA).convert_alpha()  # A transparent surface for the damage indicator.
+pygame.draw.rect(damage_overlay, (255, 0, 0), (0, 0, 60, 60), 4)  # Draws the red border into it once.
 
 # ---------------------------------
 # 4.3 BULLET VARIABLES
 # ---------------------------------
-bullets = []  # An empty list to store all active bullet rectangles on the screen.
+if IS_PYPY:
+    bullet_x, bullet_y = [], []  # Lists holding the X and Y position of every active bullet.
+else:
+    COORD_DTYPE = np.int16  # Positions and speeds fit easily in 16 bits, which halves the memory the arrays below use.
+    bullet_x = np.empty(0, dtype=COORD_DTYPE)  # An array holding the X position of every active bullet.
+    bullet_y = np.empty(0, dtype=COORD_DTYPE)  # An array holding the Y position of every active bullet.
 bulletY_change = 20  # The speed at which bullets travel up the screen.
 bullet_delay = 100  # The delay in milliseconds between shots, creating a machine-gun effect.
 last_bullet_time = 0  # A timer to track when the last bullet was fired.
+space_held = False  # A flag set by key events while the spacebar is held down, so the keyboard isn't polled.
 
 # ---------------------------------
 # 4.4 ALIEN VARIABLES
 # ---------------------------------
 alien_width, alien_height = 60, 60  # Defines the width and height of the alien sprites.
-aliens = []  # An empty list to store all active alien objects.
+if IS_PYPY:
+    alien_x, alien_y, alien_x_change = [], [], []  # Lists holding the X, Y and horizontal speed of every alien.
+else:
+    alien_x = np.empty(0, dtype=COORD_DTYPE)  # An array holding the X position of every active alien.
+    alien_y = np.empty(0, dtype=COORD_DTYPE)  # An array holding the Y position of every active alien.
+    alien_x_change = np.empty(0, dtype=COORD_DTYPE)  # An array holding the horizontal speed and direction of every active alien.
+    rng = np.random.default_rng()  # NumPy's random generator, which draws a whole wave of random values in one call.
+GRID_SHIFT = 7  # Aliens are sorted into 128x128 pixel grid cells (2 ** 7 = 128) so collisions only check nearby cells.
+GRID_COLS = (WIDTH >> GRID_SHIFT) + 1  # The number of grid columns needed to cover the screen.
+GRID_ROWS = (HEIGHT >> GRID_SHIFT) + 1  # The number of grid rows needed to cover the screen.
 
 # ---------------------------------
 # 4.5 SCORE AND LIVES
@@ -343,33 +426,292 @@ aliens = []  # An empty list to store all active alien objects.
 score = 0  # Initializes the player's score for the current game to 0.
 high_score = 0  # Initializes the high score display, which will be updated after login.
 lives = 3  # Sets the number of lives the player starts with.
-font = pygame.font.Font(None, 35)  # Re-initializes a font object for the info bar.
+font = small_font  # Reuses the small font for the info bar instead of loading the same font again.
 
 
 # ---------------------------------
 # 4.6 CORE GAMEPLAY FUNCTIONS
 # ---------------------------------
-def spawn_initial_aliens(num):
-    """Creates the initial wave of aliens based on the chosen difficulty."""
-    global aliens  # Declares that this function will modify the global 'aliens' list.
-    aliens.clear()  # Removes any aliens from previous games.
-    for _ in range(num):  # Loops 'num' times to create the specified number of aliens.
-        aliens.append({  # Appends a new alien dictionary to the list.
-            'rect': pygame.Rect(random.randint(0, WIDTH - alien_width), random.randint(50, 300), alien_width,
-                                alien_height),  # Creates a rectangle for the alien at a random position.
-            'x_change': random.choice([-current_difficulty['alien_speed'], current_difficulty['alien_speed']])
-            # Assigns a random horizontal direction and speed.
-        })
-
-
-def player(x, y):
-    """Draws the player's spaceship on the screen."""
-    screen.blit(player_img, (x, y))  # `blit` is used to draw one image onto another.
-
-
-def alien(x, y):
-    """Draws an alien on the screen."""
-    screen.blit(alien_img, (x, y))  # Draws the alien image at the specified x, y coordinates.
+def grid_cell(x, y):
+    """Returns the index of the grid cell containing a position, clamping off-screen positions to the edge cells."""
+    col = min(max(x >> GRID_SHIFT, 0), GRID_COLS - 1)  # Finds the column, kept inside the grid.
+    row = min(max(y >> GRID_SHIFT, 0), GRID_ROWS - 1)  # Finds the row, kept inside the grid.
+    return row * GRID_COLS + col  # Numbers the cells row by row.
+
+
+def first_alien_in_grid(ax, ay, cell_head, next_in_cell, x, y, w, h):
+    """Returns the lowest index of an alien overlapping the rectangle, or -1, searching only the cells it could be in."""
+    first = -1  # Lowest overlapping alien index found so far.
+    # An overlapping alien's top-left corner lies between (x - alien_width, y - alien_height) and (x + w, y + h), so
+    # only the cells covering that span are searched: at most 2x2 cells for any sprite up to a cell in size.
+    col_lo = min(max((x - alien_width + 1) >> GRID_SHIFT, 0), GRID_COLS - 1)  # The first column to search.
+    col_hi = min(max((x + w - 1) >> GRID_SHIFT, 0), GRID_COLS - 1)  # The last column to search.
+    row_lo = min(max((y - alien_height + 1) >> GRID_SHIFT, 0), GRID_ROWS - 1)  # The first row to search.
+    row_hi = min(max((y + h - 1) >> GRID_SHIFT, 0), GRID_ROWS - 1)  # The last row to search.
+    for r in range(row_lo, row_hi + 1):  # Loops over those rows...
+        for c in range(col_lo, col_hi + 1):  # ...and columns.
+            i = cell_head[r * GRID_COLS + c]  # Gets the first alien in this cell.
+            while i >= 0:  # Walks through every alien in the cell.
+                if ax[i] < x + w and ax[i] + alien_width > x and ay[i] < y + h and \
+                        ay[i] + alien_height > y and (first < 0 or i < first):  # Checks for an overlap.
+                    first = i
+                i = next_in_cell[i]  # Moves on to the next alien in the same cell.
+    return first
+
+
+def update_world_loop(ax, ay, vx, drop, bx, by, bullet_speed, bw, bh, px, py, pw, ph, destroyed, spent):
+    """Moves all aliens and bullets and resolves their collisions one at a time (compiled by Numba or PyPy's JIT).
+
+    Has the same inputs and results as update_world_numpy, and works on NumPy arrays and lists alike.
+    """
+    cell_head = new_index_buffer(GRID_COLS * GRID_ROWS)  # The first alien in each grid cell, -1 if empty.
+    next_in_cell = new_index_buffer(len(ax))  # The next alien in the same cell as each alien, -1 at the end.
+    for i in range(len(ax)):  # Loops over every alien.
+        ax[i] += vx[i]  # Moves the alien horizontally.
+        if ax[i] <= 0 or ax[i] + alien_width >= WIDTH:  # Checks if the alien hit a side of the screen.
+            vx[i] = -vx[i]  # Reverses the alien's horizontal direction.
+            ay[i] += drop  # Moves the alien down.
+        cell = grid_cell(ax[i], ay[i])  # Finds the grid cell of the alien's top-left corner.
+        next_in_cell[i] = cell_head[cell]  # Adds the alien to the front of that cell's list.
+        cell_head[cell] = i
+        destroyed[i] = False  # No alien has been destroyed yet.
+    for j in range(len(bx)):  # Moves each bullet and checks it against the aliens near it.
+        by[j] -= bullet_speed  # Moves the bullet up the screen.
+        spent[j] = by[j] + bh < 0  # Marks the bullet if it has gone off the top of the screen.
+        if not spent[j]:
+            i = first_alien_in_grid(ax, ay, cell_head, next_in_cell, bx[j], by[j], bw, bh)  # Finds the alien hit.
+            if i >= 0 and not destroyed[i]:  # Each alien is destroyed once, by the first bullet to hit it.
+                destroyed[i] = True  # Marks the alien as destroyed.
+                spent[j] = True  # Marks the bullet as used up.
+    return first_alien_in_grid(ax, ay, cell_head, next_in_cell, px, py, pw, ph)  # Checks the player the same way.
+
+
+# ---------------------------------
+# 4.7 ALIEN AND BULLET STORAGE
+# ---------------------------------
+# The rest of the game only goes through the functions below, which exist once for lists (PyPy) and once for
+# NumPy arrays (CPython).
+if IS_PYPY:
+    def new_index_buffer(size):
+        """Returns a list of 'size' alien indexes, all -1 (no alien)."""
+        return [-1] * size
+
+    def spawn_initial_aliens(num):
+        """Creates the initial wave of aliens based on the chosen difficulty."""
+        global alien_x, alien_y, alien_x_change  # Declares that this function will replace the global alien lists.
+        randint, choice, directions = random.randint, random.choice, (-alien_speed, alien_speed)  # Looked up once.
+        max_x = WIDTH - alien_width  # The furthest right an alien can start.
+        alien_x = [randint(0, max_x) for _ in range(num)]  # Picks a random X for every alien.
+        alien_y = [randint(50, 300) for _ in range(num)]  # Picks a random Y position for every alien.
+        alien_x_change = [choice(directions) for _ in range(num)]  # Picks a random direction for each.
+
+    def respawn_aliens(index):
+        """Moves the given aliens back to random spots near the top of the screen, reusing their slots in the lists."""
+        randint, choice, directions = random.randint, random.choice, (-alien_speed, alien_speed)  # Looked up once.
+        max_x = WIDTH - alien_width  # The furthest right an alien can respawn.
+        for i in index:  # Loops over the aliens to respawn.
+            alien_x[i] = randint(0, max_x)  # Picks a new random X position.
+            alien_y[i] = randint(50, 150)  # Picks a new Y position near the top.
+            alien_x_change[i] = choice(directions)  # Picks a new random horizontal direction.
+
+    def fire_bullet(x, y):
+        """Fires a new bullet from the player's ship at (x, y)."""
+        bullet_x.append(x + BULLET_X_OFFSET)  # Adds a bullet centered on the ship.
+        bullet_y.append(y)
+
+    def step_world(drop, px, py, pw, ph):
+        """Moves all aliens and bullets and removes the used-up bullets.
+
+        Returns the first alien touching the player (or -1) and the indexes of the aliens destroyed by bullets.
+        """
+        global bullet_x, bullet_y  # Declares that this function will replace the global bullet lists.
+        destroyed = [False] * len(alien_x)  # Will mark the aliens destroyed this frame.
+        spent = [False] * len(bullet_x)  # Will mark the bullets to remove this frame.
+        hit_player = update_world(alien_x, alien_y, alien_x_change, drop, bullet_x, bullet_y, bulletY_change,
+                                  BULLET_W, BULLET_H, px, py, pw, ph, destroyed, spent)  # Resolves all collisions.
+        if True in spent:  # Only rebuilds the bullet lists when a bullet has to go.
+            bullet_x = [x for x, gone in zip(bullet_x, spent) if not gone]  # Keeps the bullets still in play.
+            bullet_y = [y for y, gone in zip(bullet_y, spent) if not gone]
+        return hit_player, [i for i, hit in enumerate(destroyed) if hit]  # Returns the hit and destroyed aliens.
+
+    def bullet_blits():
+        """Returns an iterator of the (image, position) pairs that draw every bullet."""
+        return zip(repeat(bullet_img), zip(bullet_x, bullet_y))  # Pairs the image with each position in C.
+
+    def alien_blits():
+        """Returns the (image, position) pairs that draw every alien not hidden by the info bar or below the screen."""
+        img, top, bottom = alien_img, HUD_HEIGHT - alien_height, HEIGHT  # Looks up the globals once, not per alien.
+        return [(img, (x, y)) for x, y in zip(alien_x, alien_y) if top < y < bottom]
+
+    def aliens_at_bottom():
+        """Checks if any alien has reached the bottom of the screen."""
+        return max(alien_y, default=0) > HEIGHT - alien_height  # Only the lowest alien matters.
+
+    update_world = update_world_loop  # PyPy's JIT compiles the loop on its own.
+else:
+    def new_index_buffer(size):
+        """Returns an array of 'size' alien indexes, all -1 (no alien)."""
+        return np.full(size, -1, np.int64)
+
+    def spawn_initial_aliens(num):
+        """Creates the initial wave of aliens based on the chosen difficulty."""
+        global alien_x, alien_y, alien_x_change  # Declares that this function will replace the global alien arrays.
+        alien_x = rng.integers(0, WIDTH - alien_width, num, dtype=COORD_DTYPE,
+                               endpoint=True)  # Picks a random X position for every alien.
+        alien_y = rng.integers(50, 300, num, dtype=COORD_DTYPE, endpoint=True)  # Picks a random Y position for every alien.
+        alien_x_change = rng.choice(np.array([-alien_speed, alien_speed], dtype=COORD_DTYPE),
+                                    num)  # Assigns every alien a random horizontal direction.
+
+    def respawn_aliens(index):
+        """Moves the given aliens back to random spots near the top of the screen, reusing their slots in the arrays."""
+        count = len(index)  # The number of aliens to respawn.
+        alien_x[index] = rng.integers(0, WIDTH - alien_width, count, dtype=COORD_DTYPE,
+                                      endpoint=True)  # Picks a new random X position for each alien.
+        alien_y[index] = rng.integers(50, 150, count, dtype=COORD_DTYPE, endpoint=True)  # Picks a new Y near the top.
+        alien_x_change[index] = rng.choice(np.array([-alien_speed, alien_speed], dtype=COORD_DTYPE),
+                                           count)  # Picks a new random horizontal direction.
+
+    def aliens_overlapping(ax, ay, x, y, w, h):
+        """Returns a boolean array marking every alien that overlaps the given rectangle."""
+        return (ax < x + w) & (ax + alien_width > x) & (ay < y + h) & (ay + alien_height > y)  # Same test as Rect.colliderect.
+
+    def update_world_numpy(ax, ay, vx, drop, bx, by, bullet_speed, bw, bh, px, py, pw, ph, destroyed, spent):
+        """Moves all aliens and bullets and resolves their collisions, using NumPy array math.
+
+        Fills 'destroyed' (per alien) and 'spent' (per bullet, off-screen or used up), and returns the index of the
+        first alien touching the player, or -1.
+        """
+        ax += vx  # Moves every alien horizontally at once.
+        at_edge = (ax <= 0) | (ax + alien_width >= WIDTH)  # Marks the aliens that hit a side of the screen.
+        np.negative(vx, out=vx, where=at_edge)  # Reverses the horizontal direction of those aliens, in place.
+        ay += at_edge * drop  # Moves those aliens down (the mask counts as 1 for them and 0 for everyone else).
+        by -= bullet_speed  # Moves every bullet up the screen.
+        spent[:] = by + bh < 0  # Marks the bullets that have gone off the top of the screen.
+        destroyed[:] = False  # No alien has been destroyed yet.
+        hits = aliens_overlapping(ax, ay, bx[:, None], by[:, None], bw, bh)  # Tests every bullet (rows) against every alien.
+        hits &= ~spent[:, None]  # Bullets that left the screen can't hit anything.
+        if hits.size:  # argmax needs at least one bullet and one alien.
+            first = np.where(hits.any(axis=1), hits.argmax(axis=1), -1)  # Each bullet's first alien, or -1 for a miss.
+            hit_bullets = np.flatnonzero(first >= 0)  # Finds the bullets that hit an alien.
+            killed, first_bullet = np.unique(first[hit_bullets],
+                                             return_index=True)  # Each alien is destroyed once, by the first bullet to hit it.
+            destroyed[killed] = True  # Marks those aliens as destroyed.
+            spent[hit_bullets[first_bullet]] = True  # Marks the bullets that destroyed them as used up.
+        hit = np.flatnonzero(aliens_overlapping(ax, ay, px, py, pw, ph))  # Finds the aliens touching the player.
+        return hit[0] if hit.size else -1  # Returns the first alien touching the player, or -1 if none is.
+
+    if njit is not None:  # Uses the compiled loop when Numba is available.
+        new_index_buffer = njit(cache=True)(new_index_buffer)  # Compiles the helpers first, so the loop calls the compiled versions.
+        grid_cell = njit(cache=True)(grid_cell)
+        first_alien_in_grid = njit(cache=True)(first_alien_in_grid)
+        update_world = njit(cache=True)(update_world_loop)  # Compiles the loop; 'cache' stores the result on disk.
+        _one = np.zeros(1, dtype=COORD_DTYPE)  # A tiny dummy array used to trigger compilation for int16 arrays.
+        update_world(_one, _one.copy(), _one.copy(), 0, _one.copy(), _one.copy(), 0, 0, 0, 0, 0, 0, 0,
+                     np.zeros(1, dtype=np.bool_), np.zeros(1, dtype=np.bool_)
+                     )  # Compiles now, so the delay happens before the game starts rather than mid-game.
+    else:
+        update_world = update_world_numpy  # Falls back to NumPy array math.
+
+    def _make_fire_bullet():
+        """Builds fire_bullet with the bullet offset and the append function looked up once instead of on every shot."""
+        x_offset, append, coord = BULLET_X_OFFSET, np.append, COORD_DTYPE  # Captures the offset and the calls each shot needs.
+
+        def fire_bullet(x, y):
+            """Fires a new bullet from the player's ship at (x, y)."""
+            global bullet_x, bullet_y  # Declares that this function will replace the global bullet arrays.
+            bullet_x = append(bullet_x, coord(x + x_offset))  # Adds a bullet centered on the ship, keeping the array's type.
+            bullet_y = append(bullet_y, coord(y))
+
+        return fire_bullet
+
+    fire_bullet = _make_fire_bullet()  # Creates the specialized bullet firing function.
+
+    def step_world(drop, px, py, pw, ph):
+        """Moves all aliens and bullets and removes the used-up bullets.
+
+        Returns the first alien touching the player (or -1) and the indexes of the aliens destroyed by bullets.
+        """
+        global bullet_x, bullet_y  # Declares that this function will replace the global bullet arrays.
+        destroyed = np.empty(len(alien_x), dtype=np.bool_)  # Will mark the aliens destroyed this frame.
+        spent = np.empty(len(bullet_x), dtype=np.bool_)  # Will mark the bullets to remove this frame.
+        hit_player = update_world(alien_x, alien_y, alien_x_change, drop, bullet_x, bullet_y, bulletY_change,
+                                  BULLET_W, BULLET_H, px, py, pw, ph, destroyed, spent)  # Resolves all collisions.
+        bullet_x, bullet_y = bullet_x[~spent], bullet_y[~spent]  # Removes bullets that left the screen or hit an alien.
+        return hit_player, np.flatnonzero(destroyed)  # Returns the alien hitting the player and the destroyed aliens.
+
+    def bullet_blits():
+        """Returns an iterator of the (image, position) pairs that draw every bullet."""
+        return zip(repeat(bullet_img), zip(bullet_x.tolist(), bullet_y.tolist()))  # Pairs the image with each position in C.
+
+    def alien_blits():
+        """Returns an iterator of the (image, position) pairs that draw every alien not hidden by the bar or off-screen."""
+        visible = (alien_y + alien_height > HUD_HEIGHT) & (alien_y < HEIGHT)  # Marks the aliens that can be seen.
+        return zip(repeat(alien_img), zip(alien_x[visible].tolist(), alien_y[visible].tolist()))  # Pairs them in C.
+
+    def aliens_at_bottom():
+        """Checks if any alien has reached the bottom of the screen."""
+        return bool((alien_y + alien_height > HEIGHT).any())
+
+
+# ---------------------------------
+# 4.8 KEYBOARD CONTROLS
+# ---------------------------------
+def set_player_x_change(value):
+    """Sets the player's horizontal speed."""
+    global playerX_change  # Declares that this function will change the global speed.
+    playerX_change = value
+
+
+def set_player_y_change(value):
+    """Sets the player's vertical speed."""
+    global playerY_change  # Declares that this function will change the global speed.
+    playerY_change = value
+
+
+def set_space_held(value):
+    """Records whether the spacebar is held down."""
+    global space_held  # Declares that this function will change the global flag.
+    space_held = value
+
+
+def restart_game():
+    """Resets the score, lives, player and bullets, and goes back to the start screen."""
+    global game_state, score, lives, playerX, playerY, bullet_x, bullet_y, space_held  # Declares the reset globals.
+    game_state = START  # Resets the game state to the start screen.
+    score = 0  # Resets the score.
+    lives = 3  # Resets the lives.
+    playerX = WIDTH // 2  # Resets the player's position.
+    playerY = HEIGHT - 150  # Resets the player's position.
+    bullet_x = bullet_x[:0]  # Clears any bullets left on the screen.
+    bullet_y = bullet_y[:0]
+    space_held = False  # Forgets a spacebar that was released outside of gameplay.
+
+
+def do_nothing():
+    """Handles the keys that have no action."""
+
+
+# The handlers for each key in each game state, so an event is a single dictionary lookup instead of a chain of ifs.
+KEYDOWN_HANDLERS = {
+    START: {},  # The start screen is only controlled with the mouse.
+    PLAYING: {
+        pygame.K_a: partial(set_player_x_change, -player_speed),  # Moves left.
+        pygame.K_d: partial(set_player_x_change, player_speed),  # Moves right.
+        pygame.K_w: partial(set_player_y_change, -player_speed),  # Moves up.
+        pygame.K_s: partial(set_player_y_change, player_speed),  # Moves down.
+        pygame.K_SPACE: partial(set_space_held, True),  # Starts firing.
+    },
+    GAME_OVER: {
+        pygame.K_r: restart_game,  # Restarts the game.
+    },
+}
+PLAY_KEYUP_HANDLERS = {  # Releasing a key only does something during gameplay.
+    pygame.K_a: partial(set_player_x_change, 0),  # Stops horizontal movement.
+    pygame.K_d: partial(set_player_x_change, 0),
+    pygame.K_w: partial(set_player_y_change, 0),  # Stops vertical movement.
+    pygame.K_s: partial(set_player_y_change, 0),
+    pygame.K_SPACE: partial(set_space_held, False),  # Stops firing.
+}
 
 
 # ===================================================================================
@@ -393,40 +735,38 @@ else:
 # ---------------------------------
 clock = pygame.time.Clock()  # Creates a clock object to manage the game's frame rate.
 running = True  # The main flag that keeps the game loop running.
+redraw_all = True  # A flag for frames that must redraw and update the whole screen (the first frame of each state).
+dirty_rects = []  # The screen areas drawn on during the previous frame, which must be erased and updated again.
+# The game logic advances in fixed steps of STEP_MS, however long each frame takes, and the screen is drawn once per
+# frame after the steps that fit. A slow frame then runs extra steps instead of slowing the whole game down.
+STEP_MS = 1000 / FPS  # The game time one logic step covers.
+MAX_STEPS = 5  # The most steps run in one frame, so a long stall doesn't leave the game stuck catching up.
+# The backlog is kept about half a step full, so the usual 1ms jitter in frame times doesn't make frames flip between
+# running 0 and 2 steps.
+lag = 0  # Time in milliseconds that has passed but hasn't been simulated yet.
 
 while running:  # The heart of the game; this loop runs continuously until 'running' is set to False.
-    screen.blit(background, (0, 0))  # Redraws the background image on every frame, clearing the previous frame.
+    drawn_rects = []  # Collects the screen areas drawn on during this frame.
+    frame_state = game_state  # Remembers which state this frame started in.
     current_time = pygame.time.get_ticks()  # Gets the current time in milliseconds since Pygame was initialized.
 
     # --- Event Handling ---
     for event in pygame.event.get():  # Processes the queue of all user input events.
         if event.type == pygame.QUIT:  # Checks if the user has clicked the window's close button.
             running = False  # Sets the running flag to False to exit the main loop.
+        if event.type == pygame.VIDEOEXPOSE:  # Checks if the window was uncovered and needs repainting.
+            redraw_all = True  # Redraws everything, since idle menus are otherwise never drawn again.
 
         if event.type == pygame.KEYDOWN:  # Checks if a key has been pressed down.
             if event.key == pygame.K_ESCAPE:  # Checks if the pressed key was the Escape key.
                 running = False  # Exits the main loop.
 
-            if game_state == GAME_OVER and event.key == pygame.K_r:  # If the game is over and the 'R' key is pressed.
-                game_state = START  # Resets the game state to the start screen.
-                score = 0  # Resets the score.
-                lives = 3  # Resets the lives.
-                playerX = WIDTH // 2  # Resets the player's position.
-                playerY = HEIGHT - 150  # Resets the player's position.
-                bullets.clear()  # Clears any bullets left on the screen.
-
-            elif game_state == PLAYING:  # Handles key presses only when in the 'PLAYING' state.
-                if event.key == pygame.K_a: playerX_change = -player_speed  # Moves left.
-                if event.key == pygame.K_d: playerX_change = player_speed  # Moves right.
-                if event.key == pygame.K_w: playerY_change = -player_speed  # Moves up.
-                if event.key == pygame.K_s: playerY_change = player_speed  # Moves down.
+            KEYDOWN_HANDLERS[game_state].get(event.key, do_nothing)()  # Runs the key's action in the current state.
 
         if event.type == pygame.KEYUP and game_state == PLAYING:  # Checks if a key has been released.
-            if event.key in [pygame.K_a, pygame.K_d]: playerX_change = 0  # Stops horizontal movement.
-            if event.key in [pygame.K_w, pygame.K_s]: playerY_change = 0  # Stops vertical movement.
+            PLAY_KEYUP_HANDLERS.get(event.key, do_nothing)()  # Runs the key's release action.
 
         if game_state == START:  # Handles events only when on the start screen.
-            easy_btn, medium_btn, hard_btn = show_start_screen()  # Redraws buttons to get their latest rects.
             if event.type == pygame.MOUSEBUTTONDOWN:  # Checks for a mouse click.
                 if easy_btn.collidepoint(event.pos):
                     difficulty = "Easy"  # Sets difficulty to Easy.
@@ -438,100 +778,101 @@ while running:  # The heart of the game; this loop runs continuously until 'runn
                     continue  # If the click wasn't on a button, ignore it and continue the loop.
 
                 current_difficulty = difficulty_settings[difficulty]  # Loads the settings for the chosen difficulty.
+                alien_speed = current_difficulty['alien_speed']  # Copies the alien speed and drop out of the
+                alien_drop = current_difficulty['alien_drop']  # dictionary once, instead of every frame.
                 spawn_initial_aliens(current_difficulty['num_aliens'])  # Creates the first wave of aliens.
                 game_state = PLAYING  # Changes the game state to start the gameplay.
+                lag = STEP_MS * 1.5  # Forgets the time spent in the menus: one step now, and half a step kept in hand.
+
+    # --- Drawing Preparation ---
+    # 'background' is the clean frame: it is scaled once at load and never drawn on, so copying any area of it back
+    # erases exactly that area. An animated background would have to redraw the whole screen every frame instead.
+    redraw_all = redraw_all or game_state != frame_state  # A key or click that changed the state redraws everything.
+    if redraw_all:  # Checks if the whole screen needs to be redrawn.
+        screen.blit(background, (0, 0))  # Redraws the whole background image, clearing the previous frame.
+    else:
+        screen.blits([(background, rect, rect) for rect in dirty_rects],
+                     doreturn=0)  # Only erases the areas drawn on last frame by copying the background back over them.
 
     # --- Game State Logic ---
     if game_state == START:  # If the game is in the 'START' state.
-        show_start_screen()  # Continuously draw the start screen.
+        if redraw_all:  # The start screen never changes, so it is only drawn when the screen was cleared.
+            show_start_screen()  # Draws the start screen.
 
     elif game_state == PLAYING:  # If the game is in the 'PLAYING' state.
-        # Player Logic
-        playerX += playerX_change  # Updates the player's X position based on their speed.
-        playerY += playerY_change  # Updates the player's Y position based on their speed.
-        player_rect = pygame.Rect(playerX, playerY, 60, 60)  # Creates a rectangle for the player's current position.
-        player_rect.clamp_ip(screen.get_rect())  # Prevents the player from moving off-screen.
-        playerX, playerY = player_rect.x, player_rect.y  # Updates the player's coordinates after clamping.
-        player(playerX, playerY)  # Draws the player at the new position.
-
-        if player_damaged:  # Checks if the player is in a damaged state.
-            if current_time - damage_timer < 300:  # If it's been less than 300ms since being hit.
-                if current_time % 100 < 50:  # Creates a blinking effect by only drawing the damage indicator half the time.
-                    pygame.draw.rect(screen, (255, 0, 0, 150), player_rect,
-                                     4)  # Draws a red rectangle around the player.
-            else:
-                player_damaged = False  # Ends the damaged state after 300ms.
-
-        # Bullet Logic
-        keys = pygame.key.get_pressed()  # Gets the state of all keyboard keys.
-        if keys[pygame.K_SPACE]:  # Checks if the spacebar is being held down.
-            if current_time - last_bullet_time > bullet_delay:  # Checks if enough time has passed since the last shot.
-                last_bullet_time = current_time  # Resets the bullet timer.
-                bullet_rect = pygame.Rect(playerX + 20, playerY, bullet_img.get_width(),
-                                          bullet_img.get_height())  # Creates a new bullet rectangle at the player's position.
-                bullets.append(bullet_rect)  # Adds the new bullet to the list of active bullets.
-
-        for bullet in bullets[:]:  # Loops through a copy of the bullets list (to allow removing items while iterating).
-            bullet.y -= bulletY_change  # Moves the bullet up the screen.
-            if bullet.bottom < 0:  # Checks if the bullet has gone off the top of the screen.
-                bullets.remove(bullet)  # Removes the bullet from the list.
-            else:
-                screen.blit(bullet_img, bullet)  # Draws the bullet at its new position.
-
-        # Alien Logic
-        for alien_obj in aliens[:]:  # Loops through a copy of the aliens list.
-            alien_obj['rect'].x += alien_obj['x_change']  # Moves the alien horizontally.
-
-            if alien_obj['rect'].left <= 0 or alien_obj[
-                'rect'].right >= WIDTH:  # Checks if the alien hit the side of the screen.
-                alien_obj['x_change'] *= -1  # Reverses the alien's horizontal direction.
-                alien_obj['rect'].y += current_difficulty['alien_drop']  # Moves the alien down.
+        steps = 0  # Counts the logic steps run this frame.
+        while lag >= STEP_MS and steps < MAX_STEPS and game_state == PLAYING:  # Catches the game up to the clock.
+            lag -= STEP_MS  # Uses up one step's worth of time.
+            steps += 1
+
+            # Player Logic
+            playerX += playerX_change  # Updates the player's X position based on their speed.
+            playerY += playerY_change  # Updates the player's Y position based on their speed.
+            player_rect.topleft = (playerX, playerY)  # Moves the player's rectangle to the new position.
+            player_rect.clamp_ip(screen_rect)  # Prevents the player from moving off-screen.
+            playerX, playerY = player_rect.topleft  # Updates the player's coordinates after clamping.
+
+            if player_damaged and current_time - damage_timer >= 300:  # Checks if 300ms have passed since being hit.
+                player_damaged = False  # Ends the damaged state.
+
+            # Bullet Logic
+            if space_held:  # Checks if the spacebar is being held down.
+                if current_time - last_bullet_time > bullet_delay:  # Checks if enough time has passed since the last shot.
+                    last_bullet_time = current_time  # Resets the bullet timer.
+                    fire_bullet(playerX, playerY)  # Fires a new bullet from the player's position.
+
+            # Alien and Bullet Logic
+            hit_player, destroyed = step_world(alien_drop, player_rect.x, player_rect.y,
+                                               player_rect.width, player_rect.height)  # Moves everything, resolves all collisions.
 
             # Collision Detection
-            if player_rect.colliderect(alien_obj['rect']):  # Checks for a collision between the player and an alien.
-                if not player_damaged:  # Only processes the collision if the player is not already in a damaged state.
-                    lives -= 1  # Decrements the player's lives.
-                    player_damaged = True  # Puts the player in a damaged state.
-                    damage_timer = current_time  # Starts the invulnerability timer.
-                    aliens.remove(alien_obj)  # Removes the alien that hit the player.
-
-            for bullet in bullets[:]:  # Nested loop to check each bullet against the current alien.
-                if bullet.colliderect(alien_obj['rect']):  # Checks for a collision between a bullet and the alien.
-                    score += 10  # Increases the player's score.
-                    if alien_obj in aliens: aliens.remove(alien_obj)  # Removes the hit alien.
-                    bullets.remove(bullet)  # Removes the bullet that hit the alien.
-                    aliens.append({  # Spawns a new alien to replace the one that was destroyed.
-                        'rect': pygame.Rect(random.randint(0, WIDTH - alien_width), random.randint(50, 150),
-                                            alien_width, alien_height),
-                        'x_change': random.choice(
-                            [-current_difficulty['alien_speed'], current_difficulty['alien_speed']])
-                    })
-                    break  # Exits the inner bullet loop since this bullet is gone.
-
-            if alien_obj in aliens and alien_obj[
-                'rect'].bottom > HEIGHT:  # Checks if an alien has reached the bottom of the screen.
-                lives = 0  # The player loses immediately.
+            if len(destroyed):  # Checks if any alien was destroyed.
+                score += 10 * len(destroyed)  # Increases the player's score for each destroyed alien.
+                respawn_aliens(destroyed)  # Respawns the destroyed aliens in place at the top.
 
-            if alien_obj in aliens:  # Checks if the alien still exists (it might have been removed).
-                alien(alien_obj['rect'].x, alien_obj['rect'].y)  # Draws the alien.
+            if hit_player >= 0 and not player_damaged:  # Checks for a collision while the player is not already damaged.
+                lives -= 1  # Decrements the player's lives.
+                player_damaged = True  # Puts the player in a damaged state.
+                damage_timer = current_time  # Starts the invulnerability timer.
+                respawn_aliens([hit_player])  # Sends the alien that hit the player back to the top, keeping the count constant.
 
-        # Game Over Check
-        if lives <= 0:  # Checks if the player has run out of lives.
-            users = load_users()  # Loads the user data.
-            users[username]['last_score'] = score  # Updates the user's last score.
-            if score > users[username].get('high_score', 0):  # Checks if the current score is a new high score.
-                users[username]['high_score'] = score  # Updates the high score.
-                high_score = score  # Updates the high score variable for the info bar.
-            save_users(users)  # Saves the updated scores to the file.
-            game_state = GAME_OVER  # Changes the game state to 'GAME_OVER'.
+            if aliens_at_bottom():  # Checks if any alien has reached the bottom of the screen.
+                lives = 0  # The player loses immediately.
 
-        show_info()  # Draws the information bar at the top of the screen.
+            # Game Over Check
+            if lives <= 0:  # Checks if the player has run out of lives.
+                users = load_users()  # Loads the user data.
+                users[username]['last_score'] = score  # Updates the user's last score.
+                if score > users[username].get('high_score', 0):  # Checks if the current score is a new high score.
+                    users[username]['high_score'] = score  # Updates the high score.
+                    high_score = score  # Updates the high score variable for the info bar.
+                save_users(users)  # Saves the updated scores to the file.
+                game_state = GAME_OVER  # Changes the game state to 'GAME_OVER'.
+        if steps == MAX_STEPS:  # Checks if the game fell too far behind to catch up.
+            lag = STEP_MS / 2  # Drops the backlog, so the game slows down instead of fast-forwarding.
+
+        # Drawing
+        draws = [(player_img, (playerX, playerY))]  # Starts this frame's draw list with the player.
+        if player_damaged and current_time & 64:  # Blinks the damage indicator every other 64ms while damaged.
+            draws.append((damage_overlay, player_rect))  # Adds the pre-drawn red rectangle around the player.
+        draws += bullet_blits()  # Adds every bullet at its position.
+        draws += alien_blits()  # Adds every visible alien at its position.
+        draws += info_blits()  # Adds the information bar at the top of the screen.
+        # The screen is deliberately not locked around this batch: SDL refuses to blit onto a locked surface, and
+        # blits() already handles the screen once for the whole list rather than once per sprite.
+        drawn_rects = screen.blits(draws)  # Draws everything in one call and keeps the areas covered.
 
     elif game_state == GAME_OVER:  # If the game is in the 'GAME_OVER' state.
-        show_game_over()  # Continuously draw the game over screen.
-
-    pygame.display.update()  # Updates the screen to show all the changes made in this frame.
-    clock.tick(60)  # Pauses the game long enough to ensure it doesn't exceed 60 frames per second.
+        if redraw_all:  # The game over screen never changes either, so it is only drawn when the screen was cleared.
+            show_game_over()  # Draws the game over screen.
+
+    if redraw_all:  # Checks if the whole screen was redrawn this frame.
+        pygame.display.update()  # Updates the whole screen.
+    else:
+        pygame.display.update(dirty_rects + drawn_rects)  # Only updates the areas erased and drawn on this frame.
+    dirty_rects = drawn_rects  # Remembers what was drawn so it can be erased next frame.
+    redraw_all = game_state != frame_state  # The first frame in a new state redraws everything; menus then sit idle.
+    lag += clock.tick(FPS)  # Pauses to cap the frame rate, then adds the time that passed to the logic backlog.
 
 # ---------------------------------
 # 5.3 CLEANUP